@@ -0,0 +1,17 @@
+#!/bin/bash
+
+set -e
+
+# Clone the primary once, then run as a hot standby streaming from it
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    echo "Waiting for primary to accept replication connections..."
+    until PGPASSWORD="$REPLICATION_PASSWORD" pg_basebackup \
+        --host="$PRIMARY_HOST" --username="$REPLICATION_USER" \
+        --pgdata="$PGDATA" --wal-method=stream --write-recovery-conf --progress; do
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chmod 0700 "$PGDATA"
+fi
+
+exec docker-entrypoint.sh postgres -c hot_standby=on
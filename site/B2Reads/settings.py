@@ -2,7 +2,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
-from decouple import config
+from decouple import config, Csv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config("SECRET_KEY")
@@ -82,6 +82,30 @@ DATABASES = {
     }
 }
 
+# Replica health checks run inside requests, an unreachable replica must fail fast so reads fall back to the primary
+REPLICA_CONNECT_TIMEOUT = config("REPLICA_CONNECT_TIMEOUT", default=2, cast=int)
+REPLICA_CHECK_TIMEOUT = config("REPLICA_CHECK_TIMEOUT", default=1, cast=float)
+
+# Read Replicas (comma separated hosts), reads fall back to the primary when none is healthy
+DATABASE_REPLICAS = []
+for index, host in enumerate(config("DB_REPLICA_HOSTS", default='', cast=Csv())):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        "HOST": host,
+        "OPTIONS": {"connect_timeout": REPLICA_CONNECT_TIMEOUT},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+
+# Max replication lag (seconds) before a replica is skipped and how often it is checked
+REPLICA_MAX_LAG = config("REPLICA_MAX_LAG", default=5, cast=float)
+REPLICA_CHECK_INTERVAL = config("REPLICA_CHECK_INTERVAL", default=5, cast=float)
+# Book reads of a user stay on the primary for this window after their write (read-your-own-writes)
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=10, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -107,6 +131,8 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Generated OpenAPI schema and documentation pages (manage.py generate_schema)
+DOCS_ROOT = STATIC_ROOT / 'docs'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -142,18 +168,36 @@ SWAGGER_SETTINGS = {
             'Bearer': []
         }
     ],
+    'USE_SESSION_AUTH': False,
+    'SPEC_URL': STATIC_URL + 'docs/openapi.json',
 }
 
-# Caching System Configs
+REDOC_SETTINGS = {
+    'SPEC_URL': STATIC_URL + 'docs/openapi.json',
+}
+
+# Caching System Configs (Redis also carries book events pub/sub)
+REDIS_URL = config("REDIS_URL", default='redis://redis:6379/1')
+
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': 'redis://redis:6379/1',
+        'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'SERIALIZER': 'core.cache_codec.PayloadSerializer',
         },
         'KEY_PREFIX': 'drf_cache',
+        'KEY_FUNCTION': 'core.cache_codec.make_key',
     }
 }
 
+# Optional zstd compression of cached values (trades CPU for Redis memory)
+if config("CACHE_ZSTD", default=False, cast=bool):
+    CACHES['default']['OPTIONS']['COMPRESSOR'] = 'django_redis.compressors.zstd.ZStdCompressor'
+
 CACHE_TTL = 60 * 15
+
+# Idempotency-Key responses are replayed for this long, the lock covers a request still in progress
+IDEMPOTENCY_TTL = 60 * 10
+IDEMPOTENCY_LOCK_TTL = 30
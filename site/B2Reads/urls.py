@@ -1,23 +1,10 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework.permissions import AllowAny
+from django.views.static import serve
 
-from core.views import BookList, BookDetail, BookmarkManageView, RegisterLoginView, RatingManageView
-
-# Documentation Configs
-schema_view = get_schema_view(
-    openapi.Info(
-        title="B2Reads",
-        default_version='v1',
-        description="Api Endpoint Documentation",
-        contact=openapi.Contact(email="sorm1379@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=[AllowAny, ],
-)
+from core.views import BookList, BookDetail, BookmarkManageView, RegisterLoginView, RatingManageView, \
+    RatingTrendView, BookEventsView
 
 urlpatterns = [
     # Admin Dashboard
@@ -29,13 +16,16 @@ urlpatterns = [
     # Get Data Endpoint(s)
     path('books/', BookList.as_view(), name='book-list'),
     path('books/<int:id>/', BookDetail.as_view(), name='book-detail'),
+    path('books/<int:id>/events/', BookEventsView.as_view(), name='book-events'),
+    path('books/<int:id>/ratings/trends/', RatingTrendView.as_view(), name='book-rating-trends'),
+    path('ratings/trends/', RatingTrendView.as_view(), name='rating-trends'),
 
     # Post Data Endpoint(s)
     path('bookmarks/', BookmarkManageView.as_view(), name='bookmark-manage'),
     path('ratings/', RatingManageView.as_view(), name='rating-manage'),
 
-    # Documentation
-    path('', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # Documentation (generated by `manage.py generate_schema`, served by nginx directly)
+    path('', serve, {'document_root': settings.DOCS_ROOT, 'path': 'swagger.html'}, name='schema-swagger-ui'),
+    path('redoc/', serve, {'document_root': settings.DOCS_ROOT, 'path': 'redoc.html'}, name='schema-redoc'),
 
 ]
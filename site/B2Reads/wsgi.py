@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'B2Reads.settings')
 
 application = get_wsgi_application()
+
+# Import URLconf, views and serializers up front, so the uWSGI master (lazy-apps = false) holds a warmed app
+# that forked workers share copy-on-write
+from django.urls import get_resolver  # noqa: E402
+
+get_resolver().url_patterns
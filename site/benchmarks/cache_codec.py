@@ -0,0 +1,112 @@
+"""
+Compare encoded size, Redis memory and encode/decode time of cached book payloads per codec, and the cache hit
+path: decoding and rendering a payload versus reading its pre-rendered JSON variant.
+
+Payloads mimic `all_books` and `book_detail_*` values. With --redis-url each encoded payload is also stored
+and measured with MEMORY USAGE:
+
+    python benchmarks/cache_codec.py --books 500 --ratings 2000 --redis-url redis://redis:6379/15
+"""
+import argparse
+import json
+import pickle
+import sys
+import timeit
+from pathlib import Path
+
+import msgpack
+import pyzstd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.cache_codec import dumps, loads  # noqa: E402
+
+CODECS = {
+    # django_redis defaults, PickleSerializer and MSGPackSerializer
+    'pickle': (lambda value: pickle.dumps(value, pickle.HIGHEST_PROTOCOL), pickle.loads),
+    'msgpack': (msgpack.packb, msgpack.unpackb),
+    'codec': (dumps, loads),
+    'codec+zstd': (lambda value: pyzstd.compress(dumps(value)), lambda value: loads(pyzstd.decompress(value))),
+}
+
+
+def book_list_payload(books):
+    return [
+        {'id': index, 'title': f'Book Title Number {index}', 'bookmarks_count': index % 37, 'is_bookmark': False}
+        for index in range(books)
+    ]
+
+
+def book_detail_payload(ratings):
+    return {
+        'id': 1,
+        'title': 'Book Title Number 1',
+        'summary': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20,
+        'reviews_count': ratings // 2,
+        'scores_count': ratings,
+        'scores_mean': 3.6,
+        'scores_count_group_by_number': [{'score': score, 'count': ratings // 5} for score in range(1, 6)],
+        'ratings': [
+            {'user': index, 'book': 1, 'score': index % 5 + 1,
+             'review': f'Review text number {index}, a fair read.' if index % 2 else None}
+            for index in range(ratings)
+        ],
+    }
+
+
+def render(payload):
+    # Same output as rest_framework's JSONRenderer
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+
+
+def measure(payload, encode, decode, number):
+    encoded = encode(payload)
+    encode_time = timeit.timeit(lambda: encode(payload), number=number) / number * 1e6
+    decode_time = timeit.timeit(lambda: decode(encoded), number=number) / number * 1e6
+    return encoded, encode_time, decode_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=500, help='Books in the all_books payload.')
+    parser.add_argument('--ratings', type=int, default=2000, help='Ratings in the book_detail payload.')
+    parser.add_argument('--number', type=int, default=200, help='Timing iterations.')
+    parser.add_argument('--redis-url', help='Redis database used to measure MEMORY USAGE (keys are removed).')
+    args = parser.parse_args()
+
+    client = None
+    if args.redis_url:
+        import redis
+
+        client = redis.Redis.from_url(args.redis_url)
+
+    payloads = {'all_books': book_list_payload(args.books), 'book_detail': book_detail_payload(args.ratings)}
+
+    print(f"{'payload':<14}{'codec':<12}{'bytes':>10}{'redis B':>10}{'encode us':>12}{'decode us':>12}")
+    for payload_name, payload in payloads.items():
+        for codec_name, (encode, decode) in CODECS.items():
+            encoded, encode_time, decode_time = measure(payload, encode, decode, args.number)
+            redis_bytes = '-'
+            if client is not None:
+                key = f'benchmark:{payload_name}:{codec_name}'
+                client.set(key, encoded)
+                redis_bytes = client.memory_usage(key)
+                client.delete(key)
+            print(f"{payload_name:<14}{codec_name:<12}{len(encoded):>10}{redis_bytes:>10}"
+                  f"{encode_time:>12.1f}{decode_time:>12.1f}")
+
+    print(f"\n{'payload':<14}{'hit path':<36}{'us':>10}")
+    for payload_name, payload in payloads.items():
+        pickled, encoded, rendered = CODECS['pickle'][0](payload), dumps(payload), dumps(render(payload))
+        hit_paths = {
+            'pickle payload, decode + render': lambda: render(pickle.loads(pickled)),
+            'codec payload, decode + render': lambda: render(loads(encoded)),
+            'codec pre-rendered JSON': lambda: loads(rendered),
+        }
+        for hit_path, read in hit_paths.items():
+            hit_time = timeit.timeit(read, number=args.number) / args.number * 1e6
+            print(f"{payload_name:<14}{hit_path:<36}{hit_time:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Compare throughput, latency and memory of uWSGI serving profiles.
+
+Each profile starts uWSGI with its WEB_* environment on a local HTTP socket, warms it, drives the read endpoints
+with concurrent clients and samples the resident memory of the master and its workers.
+Run inside the django container, where PostgreSQL and Redis are reachable:
+
+    python benchmarks/serving_profiles.py --duration 30 --concurrency 32
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SITE_DIR = Path(__file__).resolve().parent.parent
+CORES = os.cpu_count() or 1
+
+PROFILES = {
+    # Previous uwsgi.ini: fixed processes, no threads, no memory recycling or timeouts
+    'baseline': {
+        'WEB_PROCESSES': '4', 'WEB_THREADS': '1', 'WEB_OFFLOAD_THREADS': '0', 'WEB_LISTEN': '100',
+        'WEB_HARAKIRI': '0', 'WEB_MAX_REQUESTS': '5000', 'WEB_RELOAD_ON_RSS': '0',
+    },
+    # entrypoint.sh defaults
+    'production': {
+        'WEB_PROCESSES': str(CORES), 'WEB_THREADS': '4', 'WEB_OFFLOAD_THREADS': '1', 'WEB_LISTEN': '1024',
+        'WEB_HARAKIRI': '30', 'WEB_MAX_REQUESTS': '5000', 'WEB_RELOAD_ON_RSS': '256',
+    },
+    # Fewer processes, more threads per process: lowest memory, relies on I/O bound requests
+    'threaded': {
+        'WEB_PROCESSES': str(max(CORES // 2, 1)), 'WEB_THREADS': '16', 'WEB_OFFLOAD_THREADS': '1',
+        'WEB_LISTEN': '1024', 'WEB_HARAKIRI': '30', 'WEB_MAX_REQUESTS': '5000', 'WEB_RELOAD_ON_RSS': '256',
+    },
+}
+
+
+def process_tree_rss(pid):
+    """
+    Returns resident memory (MB) of a process and its direct children.
+    """
+    pids = [pid]
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = stat.read_text().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            pids.append(int(stat.parent.name))
+
+    rss_kb = 0
+    for child in pids:
+        try:
+            for line in Path(f'/proc/{child}/status').read_text().splitlines():
+                if line.startswith('VmRSS:'):
+                    rss_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return rss_kb / 1024
+
+
+def wait_until_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f'uWSGI did not become ready on {url}')
+
+
+def run_load(base_url, paths, duration, concurrency):
+    """
+    Drives the paths round robin from concurrent clients, returns request latencies (ms) and error count.
+    """
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        latencies, errors = [], 0
+        request_number = index
+        while time.monotonic() < deadline:
+            path = paths[request_number % len(paths)]
+            request_number += 1
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(base_url + path, timeout=30).read()
+                latencies.append((time.perf_counter() - started) * 1000)
+            except (urllib.error.URLError, ConnectionError):
+                errors += 1
+        return latencies, errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+    return [latency for latencies, _ in results for latency in latencies], sum(errors for _, errors in results)
+
+
+def benchmark_profile(name, profile, args):
+    port = args.port
+    base_url = f'http://127.0.0.1:{port}'
+    env = {
+        **os.environ, **profile,
+        'WEB_SOCKET': os.path.join(tempfile.gettempdir(), f'uwsgi-bench-{name}.sock'),
+        'WEB_LOG': os.path.join(tempfile.gettempdir(), f'uwsgi-bench-{name}.log'),
+    }
+    server = subprocess.Popen(
+        ['uwsgi', '--ini', 'uwsgi.ini', '--http-socket', f'127.0.0.1:{port}'], cwd=SITE_DIR, env=env
+    )
+    try:
+        wait_until_ready(base_url + args.paths[0])
+        run_load(base_url, args.paths, args.warmup, args.concurrency)
+        idle_rss = process_tree_rss(server.pid)
+        latencies, errors = run_load(base_url, args.paths, args.duration, args.concurrency)
+        loaded_rss = process_tree_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    return {
+        'profile': name,
+        'rps': len(latencies) / args.duration,
+        'p50': statistics.median(latencies) if latencies else 0,
+        'p95': latencies[int(len(latencies) * 0.95)] if latencies else 0,
+        'errors': errors,
+        'idle_rss': idle_rss,
+        'loaded_rss': loaded_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--paths', nargs='+', default=['/books/', '/books/1/'])
+    parser.add_argument('--duration', type=float, default=30, help='Measured load seconds per profile.')
+    parser.add_argument('--warmup', type=float, default=5, help='Warmup load seconds per profile.')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--port', type=int, default=8099)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}{'idle MB':>10}{'load MB':>10}")
+    for name in args.profiles:
+        result = benchmark_profile(name, PROFILES[name], args)
+        print(f"{result['profile']:<12}{result['rps']:>10.1f}{result['p50']:>10.1f}{result['p95']:>10.1f}"
+              f"{result['errors']:>8}{result['idle_rss']:>10.1f}{result['loaded_rss']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
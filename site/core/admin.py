@@ -24,5 +24,5 @@ class BookAdmin(admin.ModelAdmin):
 
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
-    list_display = ('user', 'book', 'score', 'review')
+    list_display = ('user', 'book', 'score', 'review', 'created_at')
     search_fields = ('user__username', 'book__title')
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.db import connections, router
+from django.utils import timezone
+
+from .models import RatingDailyRollup
+
+SCORES = range(1, 6)
+
+RATING_TRENDS_SQL = """
+    WITH buckets AS (
+        SELECT date_trunc(%(interval)s, day::timestamp)::date AS period,
+               SUM(count)::int AS count,
+               SUM(score * count)::bigint AS score_sum,
+               {histogram}
+        FROM {table}
+        WHERE day >= %(since)s {book_filter}
+        GROUP BY 1
+    ),
+    periods AS (
+        -- Every period of the range, so periods without ratings count as zero in the moving window
+        SELECT generate_series(
+            date_trunc(%(interval)s, %(since)s::timestamp), date_trunc(%(interval)s, %(until)s::timestamp), %(step)s
+        )::date AS period
+    ),
+    filled AS (
+        SELECT period, COALESCE(count, 0) AS count, COALESCE(score_sum, 0) AS score_sum, {filled_scores}
+        FROM periods LEFT JOIN buckets USING (period)
+    )
+    SELECT period,
+           count,
+           score_sum::float / NULLIF(count, 0) AS mean,
+           (SUM(score_sum) OVER w)::float / NULLIF(SUM(count) OVER w, 0) AS moving_mean,
+           (AVG(count) OVER w)::float AS moving_count,
+           {scores}
+    FROM filled
+    WINDOW w AS (ORDER BY period ROWS BETWEEN %(preceding)s PRECEDING AND CURRENT ROW)
+    ORDER BY period
+"""
+
+
+def rating_trends(book_id=None, interval='day', window=7, days=90):
+    """
+    Returns score histogram, mean and moving averages (over `window` periods) of ratings per day or week,
+    for a book or all books. Computed from daily rollups (`manage.py refresh_rating_rollups`), never raw ratings.
+    Every period of the range is returned, periods without ratings have zero counts and no mean.
+    """
+    sql = RATING_TRENDS_SQL.format(
+        table=RatingDailyRollup._meta.db_table,
+        histogram=', '.join(
+            f'COALESCE(SUM(count) FILTER (WHERE score = {score}), 0)::int AS score_{score}' for score in SCORES
+        ),
+        filled_scores=', '.join(f'COALESCE(score_{score}, 0) AS score_{score}' for score in SCORES),
+        scores=', '.join(f'score_{score}' for score in SCORES),
+        book_filter='AND book_id = %(book_id)s' if book_id is not None else '',
+    )
+    today = timezone.localdate()
+    params = {
+        'interval': interval,
+        'since': today - timedelta(days=days),
+        'until': today,
+        'step': timedelta(weeks=1) if interval == 'week' else timedelta(days=1),
+        'preceding': window - 1,
+        'book_id': book_id,
+    }
+
+    with connections[router.db_for_read(RatingDailyRollup)].cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    return [
+        {
+            'period': row['period'],
+            'count': row['count'],
+            'mean': row['mean'],
+            'moving_mean': row['moving_mean'],
+            'moving_count': row['moving_count'],
+            'scores_count_group_by_number': [{'score': score, 'count': row[f'score_{score}']} for score in SCORES],
+        }
+        for row in rows
+    ]
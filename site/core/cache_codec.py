@@ -0,0 +1,124 @@
+import hashlib
+import inspect
+import pickle
+from functools import cache
+
+import msgpack
+from django_redis.serializers.base import BaseSerializer
+
+# Bump when the encoded format itself changes
+CODEC_REVISION = 1
+
+# Keys of cached serializer payloads (and their variants), versioned by serializer shape
+PAYLOAD_KEY_PREFIXES = ('all_books', 'book_detail_')
+
+MSGPACK_MARKER = b'\x01'
+PICKLE_MARKER = b'\x02'
+ROWS_EXT_TYPE = 1
+
+
+class UnsupportedValue(Exception):
+    pass
+
+
+class Rows:
+    """
+    List of dicts sharing the same keys, encoded as field names plus value arrays.
+    """
+
+    def __init__(self, fields, values):
+        self.fields = fields
+        self.values = values
+
+
+def to_packable(value):
+    """
+    Returns JSON-like value with lists of same shape dicts replaced by Rows.
+    Raises UnsupportedValue for anything that wouldn't round trip exactly (tuples, str subclasses, dates, ...).
+    """
+    if value is None or type(value) in (str, int, float, bool, bytes):
+        return value
+    if isinstance(value, dict):
+        if not all(type(key) is str for key in value):
+            raise UnsupportedValue
+        return {key: to_packable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [to_packable(item) for item in value]
+        if items and all(type(item) is dict for item in items):
+            fields = list(items[0])
+            if all(list(item) == fields for item in items):
+                return Rows(fields, [list(item.values()) for item in items])
+        return items
+    raise UnsupportedValue
+
+
+def pack_ext(value):
+    if isinstance(value, Rows):
+        return msgpack.ExtType(ROWS_EXT_TYPE, msgpack.packb([value.fields, value.values], default=pack_ext))
+    raise UnsupportedValue
+
+
+def unpack_ext(code, data):
+    if code == ROWS_EXT_TYPE:
+        fields, values = msgpack.unpackb(data, ext_hook=unpack_ext, raw=False)
+        return [dict(zip(fields, row)) for row in values]
+    return msgpack.ExtType(code, data)
+
+
+def dumps(value):
+    """
+    Returns compact binary encoding of a value, msgpack with row arrays for JSON-like payloads
+    and pickle for everything else.
+    """
+    try:
+        return MSGPACK_MARKER + msgpack.packb(to_packable(value), default=pack_ext)
+    except (UnsupportedValue, OverflowError):
+        return PICKLE_MARKER + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def loads(value):
+    """
+    Returns value decoded by dumps(), values written by the previous pickle serializer are still read.
+    """
+    marker, body = value[:1], value[1:]
+    if marker == MSGPACK_MARKER:
+        return msgpack.unpackb(body, ext_hook=unpack_ext, raw=False)
+    if marker == PICKLE_MARKER:
+        return pickle.loads(body)
+    return pickle.loads(value)
+
+
+class PayloadSerializer(BaseSerializer):
+    """
+    django_redis serializer using the compact payload codec.
+    """
+
+    def dumps(self, value):
+        return dumps(value)
+
+    def loads(self, value):
+        return loads(value)
+
+
+@cache
+def payload_schema_version():
+    """
+    Returns short hash of the cached serializers' source (declared fields, Meta and method fields' code) and the
+    class of every field, changing it with any change of the cached payload shape or values.
+    """
+    from .serializers import BookSerializer, BookDetailSerializer, RatingSerializer
+
+    shape = [CODEC_REVISION]
+    for serializer in (BookSerializer, BookDetailSerializer, RatingSerializer):
+        fields = [(name, type(field).__qualname__) for name, field in serializer().fields.items()]
+        shape += [serializer.__name__, inspect.getsource(serializer), fields]
+    return hashlib.sha1(repr(shape).encode()).hexdigest()[:8]
+
+
+def make_key(key, key_prefix, version):
+    """
+    Cache KEY_FUNCTION, embeds payload schema version in payload keys so a deploy never reads stale shapes.
+    """
+    if key.startswith(PAYLOAD_KEY_PREFIXES):
+        return f'{key_prefix}:{version}:{payload_schema_version()}:{key}'
+    return f'{key_prefix}:{version}:{key}'
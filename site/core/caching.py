@@ -0,0 +1,147 @@
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .db_routers import use_primary, use_replica, is_pinned_to_primary
+
+BOOK_LIST_CACHE_KEY = 'all_books'
+JSON_SUFFIX = ':json'
+GZIP_SUFFIX = ':gzip'
+GZIP_LEVEL = 6
+
+
+def book_detail_cache_key(book_id):
+    """
+    Returns cache key of a book details payload.
+    """
+    return f'book_detail_{book_id}'
+
+
+def invalidate_book_cache(book_id):
+    """
+    Deletes cached list and details payloads of a book with their pre-rendered variants.
+    """
+    keys = [BOOK_LIST_CACHE_KEY, book_detail_cache_key(book_id)]
+    cache.delete_many(keys + [key + suffix for key in keys for suffix in (JSON_SUFFIX, GZIP_SUFFIX)])
+
+
+def accepts_gzip(request):
+    """
+    Check if client negotiated gzip content encoding, a zero q-value (`gzip;q=0`) refuses it.
+    """
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, *params = coding.split(';')
+        if name.strip().lower() != 'gzip':
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def negotiated_variant(request):
+    """
+    Returns suffix of the pre-rendered variant to serve, gzip or plain JSON.
+    Returns None if a non JSON renderer is negotiated.
+    """
+    if request.accepted_renderer.format != 'json':
+        return None
+    return GZIP_SUFFIX if accepts_gzip(request) else JSON_SUFFIX
+
+
+def cache_payload(cache_key, payload, cache_time):
+    """
+    Caches a payload with its pre-rendered JSON and gzip variants in one write, so all are built from the same data.
+    Returns the variants by suffix.
+    """
+    body = JSONRenderer().render(payload)
+    variants = {JSON_SUFFIX: body, GZIP_SUFFIX: gzip.compress(body, compresslevel=GZIP_LEVEL)}
+    cache.set_many({cache_key: payload, **{cache_key + suffix: value for suffix, value in variants.items()}},
+                   cache_time)
+    return variants
+
+
+def rendered_response(suffix, body):
+    """
+    Returns JSON response of a pre-rendered variant.
+    """
+    response = HttpResponse(body, content_type='application/json')
+    if suffix == GZIP_SUFFIX:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def cached_rendered_response(request, cache_key):
+    """
+    Returns JSON response straight from the negotiated pre-rendered variant, without decoding the payload.
+    Returns None if a non JSON renderer is negotiated or the variant is not cached.
+    """
+    suffix = negotiated_variant(request)
+    body = cache.get(cache_key + suffix) if suffix else None
+    return None if body is None else rendered_response(suffix, body)
+
+
+def select_fields(payload, fields):
+    """
+    Returns sparse fieldset of a cached payload (dict or list of dicts).
+    """
+    if isinstance(payload, list):
+        return [select_fields(item, fields) for item in payload]
+    return {key: value for key, value in payload.items() if key in fields}
+
+
+def rebuild_database(request, cached=True):
+    """
+    Returns database context of a book read, primary within the user's pin window after their write
+    (read-your-own-writes), replicas otherwise. Payloads going to the shared cache are only read from a replica
+    that caught up with the primary, so a lagging replica never puts stale data in the cache.
+    """
+    if is_pinned_to_primary(request.user):
+        return use_primary()
+    return use_replica(caught_up=cached)
+
+
+def cached_payload_response(request, cache_key, serializer_class, load, **serializer_kwargs):
+    """
+    Returns response of a cached serializer payload, rebuilt and cached with its pre-rendered variants on a miss.
+    `load(columns)` returns the instance (or queryset) to serialize, with only `columns` loaded if given.
+    note: `?fields=` sparse fieldsets are selected from the cached payload, on a miss only the requested columns
+    are loaded and nothing is cached.
+    """
+    fields = serializer_class.parse_fields(request.query_params.get('fields'))
+
+    # Full payload hits are served from pre-rendered variants without decoding the cached payload
+    response = None if fields else cached_rendered_response(request, cache_key)
+    if response is not None:
+        return response
+
+    payload = cache.get(cache_key)
+    if payload is None and fields:
+        with rebuild_database(request, cached=False):
+            instance = load(serializer_class.model_columns(fields))
+            return Response(serializer_class(instance, fields=fields, **serializer_kwargs).data)
+
+    variants = {}
+    if payload is None:
+        with rebuild_database(request):
+            payload = serializer_class(load(None), **serializer_kwargs).data
+        variants = cache_payload(cache_key, payload, settings.CACHE_TTL)
+
+    if fields:
+        return Response(select_fields(payload, fields))
+    suffix = negotiated_variant(request)
+    if suffix in variants:
+        return rendered_response(suffix, variants[suffix])
+    return Response(payload)
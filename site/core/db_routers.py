@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+PRIMARY_DB = 'default'
+PRIMARY_PIN_CACHE_KEY = 'primary_pin'
+
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+REPLICA_REPLAYED_QUERY = "SELECT pg_last_wal_replay_lsn() >= %s::pg_lsn"
+
+_state = threading.local()
+_replica_health = {}
+
+
+@contextmanager
+def use_primary():
+    """
+    Route every read inside this block to the primary database.
+    """
+    previous = getattr(_state, 'pinned', False)
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+@contextmanager
+def use_replica(caught_up=False):
+    """
+    Route reads inside this block to one healthy replica, reads outside of it stay on the primary.
+    With `caught_up`, only a replica that replayed the primary's current WAL position is used, for reads that
+    fill the shared cache (the position is past every invalidation that happened before the block).
+    """
+    previous = getattr(_state, 'replica', None)
+    _state.replica = choose_replica(caught_up)
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def pin_cache_key(user):
+    """
+    Returns cache key of a user's primary pin.
+    """
+    return f'{PRIMARY_PIN_CACHE_KEY}:{user.pk}'
+
+
+def pin_to_primary(user):
+    """
+    Pin book reads of a user to the primary for a short window after their write, so they read their own writes
+    instead of a lagging replica. Other users keep reading from replicas.
+    """
+    cache.set(pin_cache_key(user), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user):
+    """
+    Check if a user wrote within the pin window.
+    """
+    return user.is_authenticated and bool(cache.get(pin_cache_key(user)))
+
+
+def replica_check(alias, sql, params=None):
+    """
+    Returns result of a replica check query run with REPLICA_CHECK_TIMEOUT, or None if the replica is unreachable
+    or too slow to answer. Connecting is bounded by the replica's connect_timeout.
+    """
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', [int(settings.REPLICA_CHECK_TIMEOUT * 1000)])
+            cursor.execute(sql, params)
+            result = cursor.fetchone()[0]
+            cursor.execute('RESET statement_timeout')
+            return result
+    except DatabaseError:
+        connections[alias].close()
+        return None
+
+
+def replica_lag(alias):
+    """
+    Returns replication lag of a replica in seconds, or None if the replica is unreachable.
+    """
+    lag = replica_check(alias, REPLICA_LAG_QUERY)
+    return None if lag is None else float(lag)
+
+
+def is_replica_healthy(alias):
+    """
+    Check replica lag against REPLICA_MAX_LAG, the result is kept per process for REPLICA_CHECK_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    checked_at, healthy = _replica_health.get(alias, (None, False))
+    if checked_at is None or now - checked_at > settings.REPLICA_CHECK_INTERVAL:
+        lag = replica_lag(alias)
+        healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG
+        _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+def primary_wal_position():
+    """
+    Returns current WAL position (LSN) of the primary.
+    """
+    with connections[PRIMARY_DB].cursor() as cursor:
+        cursor.execute("SELECT pg_current_wal_lsn()::text")
+        return cursor.fetchone()[0]
+
+
+def has_replayed(alias, position):
+    """
+    Check if a replica replayed the WAL up to a position, False if the replica is unreachable.
+    """
+    return bool(replica_check(alias, REPLICA_REPLAYED_QUERY, [position]))
+
+
+def choose_replica(caught_up=False):
+    """
+    Returns alias of a random healthy replica (caught up with the primary if asked), or None to use the primary.
+    """
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if is_replica_healthy(alias)]
+    if caught_up and replicas:
+        position = primary_wal_position()
+        replicas = [alias for alias in replicas if has_replayed(alias, position)]
+    return random.choice(replicas) if replicas else None
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads inside a use_replica() block to its replica, every other read and all writes to the primary.
+    Admin, authentication and write paths never read from a replica, use_primary() overrides an outer
+    use_replica() block.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'pinned', False):
+            return PRIMARY_DB
+        return getattr(_state, 'replica', None) or PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
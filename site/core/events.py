@@ -0,0 +1,132 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django_redis import get_redis_connection
+
+from .models import Book, Rating
+
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+RECONNECT_SECONDS = 1
+# Deltas buffered per client, a client that falls behind skips deltas (each one carries absolute counters)
+CLIENT_QUEUE_SIZE = 100
+
+BOOK_CHANNEL_PATTERN = 'book_events:*'
+
+
+def book_channel(book_id):
+    """
+    Returns Redis pub/sub channel of a book's events.
+    """
+    return f'book_events:{book_id}'
+
+
+def book_bookmarks_delta(book_id):
+    """
+    Returns bookmark counter of a book.
+    """
+    return {'bookmarks_count': Book.bookmarks.through.objects.filter(book_id=book_id).count()}
+
+
+def book_ratings_delta(book_id):
+    """
+    Returns rating counters of a book.
+    """
+    return Rating.objects.filter(book_id=book_id).aggregate(
+        reviews_count=Count('id', filter=Q(review__isnull=False) & ~Q(review='')),
+        scores_count=Count('score'),
+        scores_mean=Avg('score'),
+    )
+
+
+def publish_book_event(book_id, delta):
+    """
+    Publishes a compact book delta to its subscribers once the current transaction commits.
+    """
+    message = json.dumps({'id': book_id, **delta})
+    transaction.on_commit(lambda: get_redis_connection('default').publish(book_channel(book_id), message))
+
+
+class BookEventHub:
+    """
+    Relays book events of one Redis pub/sub connection per process (uvicorn worker) to in-process queues,
+    one per connected client, instead of a Redis connection per client.
+    """
+
+    def __init__(self):
+        self.queues = defaultdict(set)
+        self.listener = None
+        self.subscribed = None
+
+    async def subscribe(self, book_id):
+        """
+        Returns queue of a book's events, the shared subscription is active once this returns.
+        """
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.queues[book_id].add(queue)
+        if self.listener is None or self.listener.done() or self.listener.get_loop() is not asyncio.get_running_loop():
+            self.subscribed = asyncio.Event()
+            self.listener = asyncio.create_task(self.listen())
+        await self.subscribed.wait()
+        return queue
+
+    def unsubscribe(self, book_id, queue):
+        queues = self.queues.get(book_id, set())
+        queues.discard(queue)
+        if not queues:
+            self.queues.pop(book_id, None)
+
+    def relay(self, channel, data):
+        book_id = int(channel.decode().rpartition(':')[2])
+        for queue in self.queues.get(book_id, ()):
+            if not queue.full():
+                queue.put_nowait(data.decode())
+
+    async def listen(self):
+        """
+        Subscribes to every book channel and relays messages, reconnecting when Redis goes away.
+        """
+        while True:
+            client = aioredis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(BOOK_CHANNEL_PATTERN)
+                self.subscribed.set()
+                async for message in pubsub.listen():
+                    if message['type'] == 'pmessage':
+                        self.relay(message['channel'], message['data'])
+            except aioredis.RedisError:
+                await asyncio.sleep(RECONNECT_SECONDS)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+
+book_event_hub = BookEventHub()
+
+
+async def book_event_stream(book_id):
+    """
+    Yields server-sent events of a book: a snapshot of its counters, then every published delta.
+    """
+    queue = await book_event_hub.subscribe(book_id)
+    try:
+        snapshot = {'id': book_id, **await sync_to_async(book_bookmarks_delta)(book_id),
+                    **await sync_to_async(book_ratings_delta)(book_id)}
+        yield f'retry: {RETRY_MILLISECONDS}\nevent: book\ndata: {json.dumps(snapshot)}\n\n'
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps idle connections open through proxies
+                yield ': keepalive\n\n'
+            else:
+                yield f'event: book\ndata: {data}\n\n'
+    finally:
+        book_event_hub.unsubscribe(book_id, queue)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """
+    Returns hash of request body, used to reject a reused key with a different request.
+    """
+    return hashlib.sha256(json.dumps(request.data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def replay_response(stored, fingerprint):
+    """
+    Returns the stored response of a key, or an error if the key was used with a different request.
+    """
+    if stored['fingerprint'] != fingerprint:
+        return Response({'detail': 'Idempotency-Key Is Already Used With a Different Request!'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = Response(stored['data'], status=stored['status'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Stores the first response of a write for IDEMPOTENCY_TTL seconds and replays it for retries carrying
+    the same `Idempotency-Key` header, without running the write again.
+    note: keys are scoped per user and path, server errors (5xx) are not stored so they can be retried.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'detail': f'Idempotency-Key Must Be At Most {MAX_KEY_LENGTH} Characters!'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = f'idempotency:{request.user.pk}:{request.path}:{key}'
+        fingerprint = request_fingerprint(request)
+        stored = cache.get(cache_key)
+
+        if stored is not None:
+            return replay_response(stored, fingerprint)
+
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, True, settings.IDEMPOTENCY_LOCK_TTL):
+            return Response({'detail': 'A Request With This Idempotency-Key Is In Progress!'},
+                            status=status.HTTP_409_CONFLICT)
+        try:
+            # The previous lock holder may have stored its response after the check above
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return replay_response(stored, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    # Stored as plain JSON types, independent of serializer and error classes
+                    'data': json.loads(JSONRenderer().render(response.data)),
+                }, settings.IDEMPOTENCY_TTL)
+        finally:
+            cache.delete(lock_key)
+        return response
+
+    return wrapper
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import SwaggerUIRenderer, ReDocRenderer
+
+from core.docs import document_views
+
+API_INFO = openapi.Info(
+    title="B2Reads",
+    default_version='v1',
+    description="Api Endpoint Documentation",
+    contact=openapi.Contact(email="sorm1379@gmail.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema with Swagger and Redoc pages as static files served by nginx.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.DOCS_ROOT), help='Output directory.')
+
+    def handle(self, *args, **options):
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+
+        self.stdout.write(self.style.NOTICE('Generating OpenAPI schema...'))
+        document_views()
+        schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+        (output / 'openapi.json').write_bytes(OpenAPICodecJson(validators=[]).encode(schema))
+
+        # Pages load the schema from SPEC_URL, so serving them never introspects the API
+        renderer_context = {'request': None}
+        (output / 'swagger.html').write_text(SwaggerUIRenderer().render(schema, renderer_context=renderer_context))
+        (output / 'redoc.html').write_text(ReDocRenderer().render(schema, renderer_context=renderer_context))
+
+        self.stdout.write(self.style.SUCCESS(f'Documentation generated in {output}.'))
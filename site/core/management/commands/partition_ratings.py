@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Rating
+
+
+class Command(BaseCommand):
+    help = ('Convert the rating table into a PostgreSQL table hash partitioned by book_id. '
+            'Rows are copied in a single transaction, so run it in a maintenance window.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partitions', type=int, default=8, help='Number of hash partitions.')
+
+    def handle(self, *args, **options):
+        partitions = options['partitions']
+        if partitions < 1:
+            raise CommandError('--partitions must be at least 1.')
+
+        table = Rating._meta.db_table
+        old_table = f'{table}_unpartitioned'
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT relkind, reloptions FROM pg_class WHERE oid = %s::regclass', [table])
+            relkind, reloptions = cursor.fetchone()
+            if relkind == 'p':
+                self.stdout.write(self.style.SUCCESS(f'{table} is already partitioned.'))
+                return
+
+            # Indexes and constraints are recreated with their original names after the old table is dropped
+            cursor.execute(
+                'SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN '
+                '(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)',
+                [table, table]
+            )
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('f', 'c')",
+                [table]
+            )
+            constraints = cursor.fetchall()
+            storage = f" WITH ({', '.join(reloptions)})" if reloptions else ''
+
+            self.stdout.write(self.style.NOTICE(f'Partitioning {table} into {partitions} partitions...'))
+            cursor.execute(f'ALTER TABLE {table} RENAME TO {old_table}')
+            cursor.execute(
+                f'CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE) '
+                f'PARTITION BY HASH (book_id)'
+            )
+            for remainder in range(partitions):
+                cursor.execute(
+                    f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+                    f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder}){storage}'
+                )
+
+            cursor.execute(f'INSERT INTO {table} SELECT * FROM {old_table}')
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+                f"FROM {table}"
+            )
+            cursor.execute(f'DROP TABLE {old_table}')
+
+            # Unique keys of a partitioned table must contain the partition key
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, book_id)')
+            for name, definition in constraints:
+                cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+            for definition in indexes:
+                cursor.execute(definition)
+
+        self.stdout.write(self.style.SUCCESS(f'{table} partitioned successfully.'))
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+
+from core.db_routers import use_primary
+from core.models import Rating, RatingDailyRollup
+
+# Re-read ratings updated slightly before the last refresh, covering transactions that committed late
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = ('Refresh daily rating rollups from ratings created or updated since the last refresh. '
+            'Use --full to rebuild everything (also picks up deleted ratings).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild all rollups.')
+
+    def handle(self, *args, **options):
+        with use_primary(), transaction.atomic():
+            ratings = Rating.objects.filter(score__isnull=False)
+            rollups = RatingDailyRollup.objects.all()
+            watermark = rollups.aggregate(last=Max('last_rating_update'))['last']
+
+            if watermark and not options['full']:
+                changed = list(
+                    Rating.objects.filter(updated_at__gte=watermark - REFRESH_OVERLAP)
+                    .annotate(day=TruncDate('created_at')).values_list('book_id', 'day').distinct()
+                )
+                if not changed:
+                    self.stdout.write(self.style.SUCCESS('Rating rollups are up to date.'))
+                    return
+
+                # Recompute every (book, day) group a changed rating belongs to
+                books = {book_id for book_id, _ in changed}
+                first_day = min(day for _, day in changed)
+                last_day = max(day for _, day in changed)
+                ratings = ratings.filter(book_id__in=books, created_at__date__range=(first_day, last_day))
+                rollups = rollups.filter(book_id__in=books, day__range=(first_day, last_day))
+
+            rows = ratings.annotate(day=TruncDate('created_at')).values('book_id', 'day', 'score').annotate(
+                count=Count('id'), last_rating_update=Max('updated_at'))
+            rollups.delete()
+            created = RatingDailyRollup.objects.bulk_create(RatingDailyRollup(**row) for row in rows)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} rating rollups refreshed.'))
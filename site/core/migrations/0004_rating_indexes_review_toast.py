@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-19 13:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_rating_book_alter_rating_review_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['book', 'score'], name='rating_book_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(condition=models.Q(('review__isnull', False), models.Q(('review', ''), _negated=True)), fields=['book'], name='rating_book_reviewed_idx'),
+        ),
+        # Only rows past the ~2 kB TOAST threshold (very long reviews) are toasted, this toasts them down to 128 bytes
+        # instead of ~2 kB. Shorter reviews stay in the heap row, score aggregates rely on rating_book_score_idx.
+        # Existing rows are only affected when rewritten (e.g. by `manage.py partition_ratings`)
+        migrations.RunSQL(
+            sql='ALTER TABLE core_rating SET (toast_tuple_target = 128);',
+            reverse_sql='ALTER TABLE core_rating RESET (toast_tuple_target);',
+        ),
+    ]
@@ -0,0 +1,48 @@
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rating_indexes_review_toast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rating',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='rating',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='rating_created_at_brin'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['updated_at'], name='rating_updated_at_brin'),
+        ),
+        migrations.CreateModel(
+            name='RatingDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('score', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField()),
+                ('last_rating_update', models.DateTimeField()),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_rollups', to='core.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='rating_rollup_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('book', 'day', 'score'), name='rating_rollup_book_day_score_uniq')],
+            },
+        ),
+    ]
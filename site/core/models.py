@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, User
+from django.contrib.postgres.indexes import BrinIndex
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 
@@ -17,6 +18,38 @@ class Rating(models.Model):
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='ratings')
     score = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)], blank=True, null=True)
     review = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Narrow index so score aggregates are index-only scans that never read review text
+            models.Index(fields=['book', 'score'], name='rating_book_score_idx'),
+            models.Index(fields=['book'], name='rating_book_reviewed_idx',
+                         condition=models.Q(review__isnull=False) & ~models.Q(review='')),
+            # Ratings are append-mostly, so timestamps correlate with physical order and BRIN stays tiny
+            BrinIndex(fields=['created_at'], name='rating_created_at_brin'),
+            BrinIndex(fields=['updated_at'], name='rating_updated_at_brin'),
+        ]
 
     def __str__(self):
         return f'User: {self.user.email} | Book: {self.book.title}'
+
+
+class RatingDailyRollup(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='rating_rollups')
+    day = models.DateField()
+    score = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField()
+    last_rating_update = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'day', 'score'], name='rating_rollup_book_day_score_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='rating_rollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'Book: {self.book_id} | Day: {self.day} | Score: {self.score} | Count: {self.count}'
@@ -7,7 +7,40 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from .models import Book, Rating
 
 
-class BookSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Serializes only the field names passed with `fields` argument (e.g. `?fields=id,title`)
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """
+        Returns list of requested field names from comma separated query parameter, None if not requested.
+        """
+        if not value:
+            return None
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = set(fields) - set(cls.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown Field(s): {', '.join(sorted(unknown))}"})
+        return fields
+
+    @classmethod
+    def model_columns(cls, fields):
+        """
+        Returns model columns needed to serialize the requested fields, used with QuerySet.only().
+        """
+        concrete = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        return ['id'] + [field for field in fields if field in concrete and field != 'id']
+
+
+class BookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     List of books serializer with extra fields
     """
@@ -37,7 +70,7 @@ class BookSerializer(serializers.ModelSerializer):
             return 'Login Required'
 
 
-class BookDetailSerializer(serializers.ModelSerializer):
+class BookDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
         Details of a single book by its ID serializer with extra fields
     """
@@ -144,6 +177,8 @@ class BookmarkSerializer(serializers.Serializer):
         Bookmark data serializer
     """
     book = serializers.IntegerField(required=True, help_text="Book Id Integer")
+    action = serializers.ChoiceField(choices=['toggle', 'add', 'remove'], default='toggle',
+                                     help_text="Toggle (Default), or Add / Remove Regardless of Current State")
 
     def validate(self, data):
         book_id = data.get('book')
@@ -156,3 +191,13 @@ class BookmarkSerializer(serializers.Serializer):
         if user.ratings.filter(book_id=book_id).exists():
             raise serializers.ValidationError(f"Book With ID '{book_id}' Is Have a Rating!")
         return data
+
+
+class RatingTrendQuerySerializer(serializers.Serializer):
+    """
+        Rating trends query parameters serializer
+    """
+    interval = serializers.ChoiceField(choices=['day', 'week'], default='day', help_text="Bucket Size")
+    window = serializers.IntegerField(default=7, min_value=1, max_value=90,
+                                      help_text="Moving Average Window (Buckets)")
+    days = serializers.IntegerField(default=90, min_value=1, max_value=730, help_text="History Length In Days")
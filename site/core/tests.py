@@ -1,17 +1,40 @@
+import asyncio
+import datetime
+import gzip
+import inspect
+import io
+import json
+import pickle
+import tempfile
+import uuid
+from pathlib import Path
+from unittest import mock, skipUnless
+
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Avg
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
-from rest_framework import status
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient, APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Book, Rating
-from .serializers import BookSerializer, BookDetailSerializer
+from .cache_codec import dumps, loads, make_key, payload_schema_version
+from .events import BookEventHub
+from .db_routers import PrimaryReplicaRouter, use_primary, use_replica, is_pinned_to_primary
+from .models import Book, Rating, RatingDailyRollup
+from .serializers import BookSerializer, BookDetailSerializer, RatingSerializer
 
 
 class BookViewsTest(APITestCase):
 
     def setUp(self):
+        # Start from an empty cache, the Redis cache is shared with previous runs
+        cache.clear()
+
         # Create test user
         self.user = User.objects.create_user(username='testuser', password='testpass')
 
@@ -38,7 +61,7 @@ class BookViewsTest(APITestCase):
         books = Book.objects.all()
         serializer = BookSerializer(books, many=True, context={'request': response.wsgi_request})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.json(), serializer.data)
 
         # Test caching
         cache_key = 'all_books'
@@ -46,12 +69,17 @@ class BookViewsTest(APITestCase):
         self.assertIsNotNone(cached_books)
         self.assertEqual(cached_books, serializer.data)
 
+        # Hit is served from the pre-rendered JSON variant
+        response = self.client.get(self.book_list_url)
+        self.assertEqual(response.content, cache.get('all_books:json'))
+        self.assertEqual(response.json(), serializer.data)
+
     def test_get_book_detail(self):
         response = self.client.get(self.book_detail_url)
         book = Book.objects.get(id=self.book1.id)
         serializer = BookDetailSerializer(book)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.json(), serializer.data)
 
         # Test caching
         cache_key = f'book_detail_{self.book1.id}'
@@ -66,6 +94,40 @@ class BookViewsTest(APITestCase):
         self.assertEqual(cached_book['scores_count_group_by_number'], serializer.data['scores_count_group_by_number'])
         self.assertEqual(cached_book['ratings'], serializer.data['ratings'])
 
+    def test_get_books_sparse_fieldset(self):
+        response = self.client.get(self.book_list_url, {'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.book1.id, 'title': 'Book 1'},
+                                         {'id': self.book2.id, 'title': 'Book 2'}])
+
+        response = self.client.get(self.book_detail_url, {'fields': 'title,scores_count'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'title': 'Book 1', 'scores_count': 0})
+
+        # Unknown fields are rejected
+        response = self.client.get(self.book_detail_url, {'fields': 'id,unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_book_detail_precompressed(self):
+        response = self.client.get(self.book_detail_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)),
+                         json.loads(JSONRenderer().render(cache.get(f'book_detail_{self.book1.id}'))))
+
+        # Compressed variant is stored in the cache
+        self.assertIsNotNone(cache.get(f'book_detail_{self.book1.id}:gzip'))
+
+        # Hit is served from the compressed variant
+        response = self.client.get(self.book_detail_url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, cache.get(f'book_detail_{self.book1.id}:gzip'))
+
+        # Zero q-value refuses gzip
+        response = self.client.get(self.book_detail_url, HTTP_ACCEPT_ENCODING='gzip;q=0, deflate')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.json()['id'], self.book1.id)
+
     def test_post_bookmark_add_and_remove(self):
         # Add Bookmark
         data = {'book': self.book1.id}
@@ -83,6 +145,91 @@ class BookViewsTest(APITestCase):
         # Ensure cache is invalidated
         self.assertIsNone(cache.get('all_books'))
         self.assertIsNone(cache.get(f'book_detail_{self.book1.id}'))
+        self.assertIsNone(cache.get(f'book_detail_{self.book1.id}:json'))
+        self.assertIsNone(cache.get(f'book_detail_{self.book1.id}:gzip'))
+
+    def test_post_bookmark_explicit_action(self):
+        data = {'book': self.book1.id, 'action': 'add'}
+        for _ in range(2):
+            response = self.client.post(self.bookmark_manage_url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['detail'], 'Bookmark Added.')
+            self.assertTrue(self.user.books.filter(id=self.book1.id).exists())
+
+        data['action'] = 'remove'
+        for _ in range(2):
+            response = self.client.post(self.bookmark_manage_url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['detail'], 'Bookmark Removed.')
+            self.assertFalse(self.user.books.filter(id=self.book1.id).exists())
+
+    def test_post_bookmark_idempotency_key(self):
+        # Fresh keys, stored responses outlive the test database for IDEMPOTENCY_TTL
+        first_key, second_key = str(uuid.uuid4()), str(uuid.uuid4())
+        data = {'book': self.book1.id}
+        response = self.client.post(self.bookmark_manage_url, data, format='json', HTTP_IDEMPOTENCY_KEY=first_key)
+        self.assertEqual(response.data['detail'], 'Bookmark Added.')
+
+        # Retry replays the first response instead of toggling the bookmark back
+        response = self.client.post(self.bookmark_manage_url, data, format='json', HTTP_IDEMPOTENCY_KEY=first_key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['detail'], 'Bookmark Added.')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertTrue(self.user.books.filter(id=self.book1.id).exists())
+
+        # Same key with a different request is rejected
+        response = self.client.post(self.bookmark_manage_url, {'book': self.book2.id}, format='json',
+                                    HTTP_IDEMPOTENCY_KEY=first_key)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        # New key runs the write again
+        response = self.client.post(self.bookmark_manage_url, data, format='json', HTTP_IDEMPOTENCY_KEY=second_key)
+        self.assertEqual(response.data['detail'], 'Bookmark Removed.')
+
+    def test_post_bookmark_idempotency_key_retry_after_lock_release(self):
+        key = str(uuid.uuid4())
+        data = {'book': self.book1.id}
+        self.client.post(self.bookmark_manage_url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+        # Retry read the key before the first request stored its response, then took the released lock
+        cache_get = cache.get
+        missed = []
+
+        def racing_get(cache_key, *args, **kwargs):
+            if cache_key.startswith('idempotency:') and not missed:
+                missed.append(cache_key)
+                return None
+            return cache_get(cache_key, *args, **kwargs)
+
+        with mock.patch('core.idempotency.cache.get', side_effect=racing_get):
+            response = self.client.post(self.bookmark_manage_url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+        self.assertEqual(missed, [f'idempotency:{self.user.pk}:{self.bookmark_manage_url}:{key}'])
+        self.assertEqual(response.data['detail'], 'Bookmark Added.')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertTrue(self.user.books.filter(id=self.book1.id).exists())
+
+    def test_post_bookmark_publishes_event(self):
+        with mock.patch('core.events.get_redis_connection') as redis_connection, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.bookmark_manage_url, {'book': self.book1.id}, format='json')
+
+        channel, message = redis_connection.return_value.publish.call_args.args
+        self.assertEqual(channel, f'book_events:{self.book1.id}')
+        self.assertEqual(json.loads(message), {'id': self.book1.id, 'bookmarks_count': 1})
+
+    def test_post_rating_publishes_compact_event(self):
+        self.user.books.add(self.book1)
+        with mock.patch('core.events.get_redis_connection') as redis_connection, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.rating_manage_url, {'book': self.book1.id, 'score': 5, 'review': 'Great book!'},
+                             format='json')
+
+        channel, message = redis_connection.return_value.publish.call_args.args
+        self.assertEqual(channel, f'book_events:{self.book1.id}')
+        # Counters only, the rating and its review are not broadcast
+        self.assertEqual(json.loads(message), {'id': self.book1.id, 'bookmarks_count': 0, 'reviews_count': 1,
+                                               'scores_count': 1, 'scores_mean': 5.0})
 
     def test_post_rating_create_and_update(self):
         # Create Rating
@@ -107,6 +254,10 @@ class BookViewsTest(APITestCase):
         # Ensure bookmark is removed
         self.assertFalse(self.user.books.filter(id=self.book1.id).exists())
 
+        # Ensure reads of the writer only are pinned to the primary after the write
+        self.assertTrue(is_pinned_to_primary(self.user))
+        self.assertFalse(is_pinned_to_primary(User.objects.create_user(username='otheruser', password='testpass')))
+
         # Ensure cache is invalidated
         self.assertIsNone(cache.get('all_books'))
         self.assertIsNone(cache.get(f'book_detail_{self.book1.id}'))
@@ -120,3 +271,310 @@ class BookViewsTest(APITestCase):
         response = self.client.post(reverse('register-login'), data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['created'])
+
+
+class FakePubSub:
+    """
+    In-memory stand-in of a Redis pub/sub connection.
+    """
+
+    def __init__(self):
+        self.patterns = []
+        self.messages = asyncio.Queue()
+
+    async def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+
+    async def aclose(self):
+        pass
+
+
+class BookEventsTest(APITestCase):
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Book 1', summary='1Lorem Ipsum dolor sit amet consectetur')
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.book.bookmarks.add(self.user)
+        Rating.objects.create(user=self.user, book=self.book, score=4, review='Good book!')
+
+    def test_get_events_unknown_book(self):
+        response = self.client.get(reverse('book-events', args=[self.book.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_get_events_snapshot_and_deltas(self):
+        pubsub = FakePubSub()
+        hub = BookEventHub()
+        with mock.patch('core.events.aioredis.from_url') as from_url, mock.patch('core.events.book_event_hub', hub):
+            from_url.return_value.pubsub.return_value = pubsub
+            from_url.return_value.aclose = mock.AsyncMock()
+
+            response = await self.async_client.get(reverse('book-events', args=[self.book.id]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+
+            snapshot = (await anext(stream)).decode()
+            self.assertIn('event: book', snapshot)
+            self.assertEqual(json.loads(snapshot.rpartition('data: ')[2]), {
+                'id': self.book.id, 'bookmarks_count': 1, 'reviews_count': 1, 'scores_count': 1, 'scores_mean': 4.0
+            })
+
+            # One shared subscription relays published deltas of this book only
+            self.assertEqual(pubsub.patterns, ['book_events:*'])
+            for book_id in (self.book.id + 100, self.book.id):
+                await pubsub.messages.put({'type': 'pmessage', 'pattern': b'book_events:*',
+                                           'channel': f'book_events:{book_id}'.encode(),
+                                           'data': json.dumps({'id': book_id, 'bookmarks_count': 0}).encode()})
+            delta = (await anext(stream)).decode()
+            self.assertEqual(delta, f'event: book\ndata: {{"id": {self.book.id}, "bookmarks_count": 0}}\n\n')
+
+            hub.listener.cancel()
+
+
+class RatingTrendTest(APITestCase):
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Book 1', summary='1Lorem Ipsum dolor sit amet consectetur')
+        users = [User.objects.create_user(username=f'user{index}', password='testpass') for index in range(3)]
+        self.ratings = [Rating.objects.create(user=user, book=self.book, score=score)
+                        for user, score in zip(users, [5, 5, 3])]
+
+    def test_refresh_rollups_and_get_trends(self):
+        call_command('refresh_rating_rollups', stdout=io.StringIO())
+        self.assertEqual(
+            sorted(RatingDailyRollup.objects.values_list('score', 'count')),
+            [(3, 1), (5, 2)]
+        )
+
+        response = self.client.get(reverse('book-rating-trends', args=[self.book.id]),
+                                   {'interval': 'week', 'window': 2, 'days': 28})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Every week of the range is returned, weeks without ratings are zero and keep the window moving
+        self.assertEqual(len(response.data), 5)
+        empty, current = response.data[-2], response.data[-1]
+        self.assertEqual((empty['count'], empty['mean'], empty['moving_mean']), (0, None, None))
+        self.assertEqual(current['count'], 3)
+        self.assertAlmostEqual(current['mean'], 13 / 3)
+        self.assertAlmostEqual(current['moving_mean'], 13 / 3)
+        self.assertAlmostEqual(current['moving_count'], 1.5)
+        self.assertEqual(current['scores_count_group_by_number'][4], {'score': 5, 'count': 2})
+
+        # Incremental refresh picks up updated ratings
+        self.ratings[0].score = 1
+        self.ratings[0].save()
+        call_command('refresh_rating_rollups', stdout=io.StringIO())
+        self.assertEqual(
+            sorted(RatingDailyRollup.objects.values_list('score', 'count')),
+            [(1, 1), (3, 1), (5, 1)]
+        )
+
+        response = self.client.get(reverse('rating-trends'), {'days': 30})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 31)
+        self.assertEqual([row['count'] for row in response.data], [0] * 30 + [3])
+
+    def test_get_trends_invalid_query(self):
+        response = self.client.get(reverse('rating-trends'), {'interval': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('book-rating-trends', args=[self.book.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Hash partitioning needs PostgreSQL.')
+class PartitionRatingsCommandTest(TestCase):
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Book 1', summary='1Lorem Ipsum dolor sit amet consectetur')
+        self.users = [User.objects.create_user(username=f'user{index}', password='testpass') for index in range(3)]
+        Rating.objects.create(user=self.users[0], book=self.book, score=5, review='Great book!')
+        Rating.objects.create(user=self.users[1], book=self.book, score=3)
+
+    def fetch(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def table_layout(self):
+        # Indexes of a partitioned table are defined `ON ONLY` the parent
+        indexes = [
+            (name, definition.replace(' ON ONLY ', ' ON ')) for name, definition in self.fetch(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = 'core_rating' AND indexname != %s",
+                ['core_rating_pkey']
+            )
+        ]
+        constraints = self.fetch(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'core_rating'::regclass AND contype IN ('f', 'c')"
+        )
+        return sorted(indexes), sorted(constraints)
+
+    def test_partition_ratings(self):
+        indexes, constraints = self.table_layout()
+        last_id = Rating.objects.order_by('-id').values_list('id', flat=True)[0]
+
+        call_command('partition_ratings', partitions=4, stdout=io.StringIO())
+
+        self.assertEqual(self.fetch("SELECT relkind FROM pg_class WHERE oid = 'core_rating'::regclass"), [('p',)])
+        self.assertEqual(
+            self.fetch("SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'core_rating'::regclass"), [(4,)]
+        )
+
+        # Indexes, foreign keys and checks are recreated with their original names
+        self.assertEqual(self.table_layout(), (indexes, constraints))
+        self.assertEqual(
+            self.fetch("SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conname = 'core_rating_pkey'"),
+            [('PRIMARY KEY (id, book_id)',)]
+        )
+
+        # Partitions keep the TOAST settings
+        self.assertIn('toast_tuple_target=128',
+                      self.fetch("SELECT reloptions FROM pg_class WHERE oid = 'core_rating_p0'::regclass")[0][0])
+
+        # Sequence continues after the copied rows and the ORM works on the partitioned table
+        rating = Rating.objects.create(user=self.users[2], book=self.book, score=1)
+        self.assertEqual(rating.id, last_id + 1)
+        rating.score = 4
+        rating.save()
+        self.assertEqual(Rating.objects.filter(book=self.book).aggregate(Avg('score'))['score__avg'], 4)
+        self.assertEqual(Rating.objects.get(user=self.users[0]).review, 'Great book!')
+
+        # Running again is a no-op
+        output = io.StringIO()
+        call_command('partition_ratings', stdout=output)
+        self.assertIn('already partitioned', output.getvalue())
+
+
+class PrimaryReplicaRouterTest(SimpleTestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_use_primary_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Book), 'default')
+        self.assertEqual(self.router.db_for_write(Book), 'default')
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Book), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_reads_use_healthy_replica(self):
+        with mock.patch('core.db_routers.is_replica_healthy', return_value=True):
+            # Reads outside of a replica block (admin, authentication) stay on the primary
+            self.assertEqual(self.router.db_for_read(Book), 'default')
+
+            with use_replica():
+                self.assertEqual(self.router.db_for_read(Book), 'replica_0')
+                self.assertEqual(self.router.db_for_write(Book), 'default')
+
+                # Pinned block reads from the primary
+                with use_primary():
+                    self.assertEqual(self.router.db_for_read(Book), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_reads_fall_back_to_primary_on_lagging_replica(self):
+        with mock.patch('core.db_routers.is_replica_healthy', return_value=False), use_replica():
+            self.assertEqual(self.router.db_for_read(Book), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_reads_fall_back_to_primary_on_unreachable_replica(self):
+        # Connect timeout, then lag query cancelled by statement_timeout
+        for fail in ('connect', 'query'):
+            with mock.patch('core.db_routers.connections') as connections, \
+                    mock.patch.dict('core.db_routers._replica_health', clear=True):
+                replica = connections.__getitem__.return_value
+                execute = replica.cursor.return_value.__enter__.return_value.execute
+                if fail == 'connect':
+                    replica.cursor.side_effect = OperationalError('timeout expired')
+                else:
+                    execute.side_effect = [None, OperationalError('canceling statement due to statement timeout')]
+
+                with use_replica():
+                    self.assertEqual(self.router.db_for_read(Book), 'default')
+                replica.close.assert_called_once()
+                if fail == 'query':
+                    self.assertEqual(execute.call_args_list[0].args, ('SET statement_timeout = %s', [1000]))
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_cache_rebuilds_use_caught_up_replica(self):
+        with mock.patch('core.db_routers.is_replica_healthy', return_value=True), \
+                mock.patch('core.db_routers.primary_wal_position', return_value='0/3000060'), \
+                mock.patch('core.db_routers.has_replayed') as has_replayed:
+            has_replayed.return_value = False
+            with use_replica(caught_up=True):
+                self.assertEqual(self.router.db_for_read(Book), 'default')
+            has_replayed.assert_called_with('replica_0', '0/3000060')
+
+            has_replayed.return_value = True
+            with use_replica(caught_up=True):
+                self.assertEqual(self.router.db_for_read(Book), 'replica_0')
+
+
+class GenerateSchemaCommandTest(SimpleTestCase):
+
+    def test_generate_schema(self):
+        with tempfile.TemporaryDirectory() as output:
+            call_command('generate_schema', output=output, stdout=io.StringIO())
+            schema = json.loads((Path(output) / 'openapi.json').read_text())
+            self.assertIn('/books/', schema['paths'])
+            self.assertIn('/books/{id}/', schema['paths'])
+
+            # View documentation is applied on generation
+            book_list = schema['paths']['/books/']['get']
+            bookmarks = schema['paths']['/bookmarks/']['post']
+            self.assertIn('fields', [parameter['name'] for parameter in book_list['parameters']])
+            self.assertIn('Idempotency-Key', [parameter['name'] for parameter in bookmarks['parameters']])
+
+            # Documentation pages load the static schema artifact
+            self.assertIn('/static/docs/openapi.json', (Path(output) / 'swagger.html').read_text())
+            self.assertIn('/static/docs/openapi.json', (Path(output) / 'redoc.html').read_text())
+
+
+class CacheCodecTest(SimpleTestCase):
+
+    def test_payload_round_trip(self):
+        ratings = [{'user': index, 'book': 1, 'score': 5, 'review': 'Great book!'} for index in range(10)]
+        book = {'id': 1, 'title': 'Book 1', 'summary': 'Lorem Ipsum', 'scores_mean': 5.0, 'ratings': ratings}
+        books = [{'id': index, 'title': f'Book {index}', 'bookmarks_count': 0, 'is_bookmark': False}
+                 for index in range(10)]
+
+        for payload in (book, books, [], {}, True, b'gzip body'):
+            self.assertEqual(loads(dumps(payload)), payload)
+
+        # Rows are stored as field names plus value arrays, not repeated keys
+        self.assertLess(len(dumps(books)), len(pickle.dumps(books, pickle.HIGHEST_PROTOCOL)))
+
+    def test_unsupported_values_fall_back_to_pickle(self):
+        for value in ((1, 2), datetime.date(2024, 9, 2), {1: 'one'}):
+            self.assertEqual(loads(dumps(value)), value)
+            self.assertIs(type(loads(dumps(value))), type(value))
+
+        # Values written by the previous pickle serializer are still readable
+        self.assertEqual(loads(pickle.dumps({'detail': 'Bookmark Added.'})), {'detail': 'Bookmark Added.'})
+
+    def test_payload_keys_embed_schema_version(self):
+        version = payload_schema_version()
+        self.assertEqual(make_key('all_books', 'drf_cache', 1), f'drf_cache:1:{version}:all_books')
+        self.assertEqual(make_key('book_detail_1:gzip', 'drf_cache', 1), f'drf_cache:1:{version}:book_detail_1:gzip')
+        self.assertEqual(make_key('primary_pin', 'drf_cache', 1), 'drf_cache:1:primary_pin')
+
+        # Serializer field, field class and method changes change the version
+        original_getsource = inspect.getsource
+        changes = [
+            mock.patch.object(RatingSerializer.Meta, 'fields', ['user', 'book', 'score']),
+            mock.patch.dict(BookDetailSerializer._declared_fields, {'scores_mean': serializers.FloatField()}),
+            mock.patch('core.cache_codec.inspect.getsource', side_effect=lambda serializer: (
+                original_getsource(serializer).replace('Avg', 'Max') if serializer is BookDetailSerializer
+                else original_getsource(serializer)
+            )),
+        ]
+        for change in changes:
+            payload_schema_version.cache_clear()
+            try:
+                with change:
+                    self.assertNotEqual(payload_schema_version(), version)
+            finally:
+                payload_schema_version.cache_clear()
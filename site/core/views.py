@@ -1,140 +1,144 @@
 from django.contrib.auth import authenticate, login
-from django.core.cache import cache
-from django.http import Http404
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from django.http import Http404, StreamingHttpResponse
+from django.views import View
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from B2Reads.settings import CACHE_TTL
+from .analytics import rating_trends
+from .caching import BOOK_LIST_CACHE_KEY, book_detail_cache_key, invalidate_book_cache, cached_payload_response
+from .db_routers import use_primary, use_replica, pin_to_primary
+from .events import book_event_stream, publish_book_event, book_bookmarks_delta, book_ratings_delta
+from .idempotency import idempotent
 from .models import Book, Rating
 from .serializers import BookSerializer, RatingSerializer, RegisterLoginSerializer, BookDetailSerializer, \
-    BookmarkSerializer
+    BookmarkSerializer, RatingTrendQuerySerializer
+
+
+class PrimaryDatabaseMixin:
+    """
+    Runs the whole request (validation, toggle checks and writes) against the primary database.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_primary():
+            return super().dispatch(request, *args, **kwargs)
 
 
 class BookList(APIView):
     """
     Returns list of all books with get request.
+    note: `?fields=id,title` returns only the requested fields.
     """
 
-    def get(self, request, format=None):
-        cache_key = 'all_books'
-        cache_time = CACHE_TTL
-        books = cache.get(cache_key)
-
-        if not books:
-            books = Book.objects.all()
-            serializer = BookSerializer(books, many=True, context={'request': request})
-            books = serializer.data
-            cache.set(cache_key, books, cache_time)
+    def get_queryset(self, columns=None):
+        return Book.objects.only(*columns) if columns else Book.objects.all()
 
-        return Response(books)
+    def get(self, request, format=None):
+        return cached_payload_response(request, BOOK_LIST_CACHE_KEY, BookSerializer, self.get_queryset,
+                                       many=True, context={'request': request})
 
 
 class BookDetail(APIView):
     """
     Returns a book instance details with get request.
+    note: `?fields=id,title` returns only the requested fields.
     """
 
-    def get_object(self, id):
+    def get_object(self, id, columns=None):
+        queryset = Book.objects.only(*columns) if columns else Book.objects.all()
         try:
-            return Book.objects.get(id=id)
+            return queryset.get(id=id)
         except Book.DoesNotExist:
             raise Http404
 
     def get(self, request, id, format=None):
-        cache_key = f'book_detail_{id}'
-        cache_time = CACHE_TTL
-        book = cache.get(cache_key)
+        return cached_payload_response(request, book_detail_cache_key(id), BookDetailSerializer,
+                                       lambda columns: self.get_object(id, columns))
+
+
+class BookEventsView(View):
+    """
+    Streams server-sent events of a book with get request: a snapshot of bookmarks_count, reviews_count,
+    scores_count and scores_mean, then a delta after every bookmark or rating change.
+    note: async view, served by the ASGI app.
+    """
+
+    async def get(self, request, id):
+        if not await Book.objects.filter(id=id).aexists():
+            raise Http404
+        return StreamingHttpResponse(
+            book_event_stream(id),
+            content_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
 
-        if not book:
-            book_instance = self.get_object(id)
-            serializer = BookDetailSerializer(book_instance)
-            book = serializer.data
-            cache.set(cache_key, book, cache_time)
 
-        return Response(book)
+class RatingTrendView(APIView):
+    """
+    Returns rating volume, score histogram, mean and moving averages per day or week with get request,
+    for a single book if its ID is given, otherwise for all books.
+    note: data comes from rollups refreshed by `manage.py refresh_rating_rollups`.
+    """
 
+    def get(self, request, id=None, format=None):
+        serializer = RatingTrendQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class BookmarkManageView(APIView):
+        with use_replica():
+            if id is not None and not Book.objects.filter(id=id).exists():
+                raise Http404
+            return Response(rating_trends(book_id=id, **serializer.validated_data))
+
+
+class BookmarkManageView(PrimaryDatabaseMixin, APIView):
     """
         Handle bookmarks with post request, if bookmark for specific book already exists it will be removed,
-        otherwise it will be added.
+        otherwise it will be added. `action` set to `add` or `remove` sets the bookmark state explicitly.
         note: users can't add bookmark for books that rating instance is created before for that user
+        note: retries with the same `Idempotency-Key` header replay the first response
     """
     permission_classes = [IsAuthenticated]
 
-    @swagger_auto_schema(
-        request_body=BookmarkSerializer,
-        responses={
-            200: openapi.Response(
-                description="Successful Bookmark Manage",
-                examples={
-                    'application/json': {
-                        'detail': 'Bookmark Added.'
-                    }
-                }
-            ),
-            400: 'Invalid request'
-        },
-        security=[{'Bearer': []}]
-
-    )
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = BookmarkSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = request.user
             book_id = serializer.validated_data['book']
-            if user.books.filter(id=book_id).exists():
-                user.books.remove(book_id)
-                cache.delete('all_books')
-                cache.delete(f'book_detail_{book_id}')
-                return Response({'detail': 'Bookmark Removed.'}, status=status.HTTP_200_OK)
-            else:
-                user.books.add(book_id)
-                cache.delete('all_books')
-                cache.delete(f'book_detail_{book_id}')
-                return Response({'detail': 'Bookmark Added.'}, status=status.HTTP_200_OK)
+            action = serializer.validated_data['action']
+            bookmarked = user.books.filter(id=book_id).exists()
+            if action == 'toggle':
+                action = 'remove' if bookmarked else 'add'
+
+            # Explicit add/remove of the current state is a no-op, so retries are safe
+            if (action == 'add') != bookmarked:
+                if action == 'add':
+                    user.books.add(book_id)
+                else:
+                    user.books.remove(book_id)
+                pin_to_primary(request.user)
+                invalidate_book_cache(book_id)
+                publish_book_event(book_id, book_bookmarks_delta(book_id))
+
+            detail = 'Bookmark Added.' if action == 'add' else 'Bookmark Removed.'
+            return Response({'detail': detail}, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class RatingManageView(APIView):
+class RatingManageView(PrimaryDatabaseMixin, APIView):
     """
         Handle ratings with post request, if rating for specific book already exists it will be updated,
         otherwise it will be created.
         note: after updating or creating rating, bookmark for that book will be removed.
+        note: retries with the same `Idempotency-Key` header replay the first response
     """
     permission_classes = [IsAuthenticated]
 
-    @swagger_auto_schema(
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            properties={
-                'book': openapi.Schema(type=openapi.TYPE_INTEGER, description='Book Id Integer'),
-                'score': openapi.Schema(type=openapi.TYPE_INTEGER, description='Score Integer From 1 to 5'),
-                'review': openapi.Schema(type=openapi.TYPE_STRING, description='Review Text'),
-            }
-        ),
-        responses={
-            200: openapi.Response(
-                description="Successful Bookmark Manage",
-                examples={
-                    'application/json': {
-                        "user": 9,
-                        "book": 3,
-                        "score": 5,
-                        "review": "4444"
-                    }
-                }
-            ),
-            400: 'Invalid request'
-        },
-        security=[{'Bearer': []}]
-
-    )
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = RatingSerializer(data=request.data)
         if serializer.is_valid():
@@ -154,11 +158,15 @@ class RatingManageView(APIView):
                 rating.review = serializer.validated_data.get('review', rating.review)
                 rating.save()
 
+            delta = book_ratings_delta(book.id)
             if book in request.user.books.all():
                 request.user.books.remove(book)
+                delta.update(book_bookmarks_delta(book.id))
 
-            cache.delete('all_books')
-            cache.delete(f'book_detail_{book.id}')
+            pin_to_primary(request.user)
+            invalidate_book_cache(book.id)
+
+            publish_book_event(book.id, delta)
 
             updated_serializer = RatingSerializer(rating)
             return Response(updated_serializer.data, status=status.HTTP_200_OK)
@@ -172,26 +180,6 @@ class RegisterLoginView(APIView):
         otherwise it will be created and login.
     """
 
-    @swagger_auto_schema(
-        request_body=RegisterLoginSerializer,
-        responses={
-            200: openapi.Response(
-                description="Successful Bookmark Manage",
-                examples={
-                    'application/json': {
-                        'user_id': 1,
-                        'email': 'user@example.com',
-                        'created': False,
-                        'refresh': 'jwt-refresh-token',
-                        'access': 'jwt-access-token'
-                    }
-                }
-            ),
-            400: 'Bad Request'
-        },
-        security=[{'Bearer': []}]
-
-    )
     def post(self, request, *args, **kwargs):
         serializer = RegisterLoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -1,38 +1,27 @@
 #!/bin/bash
 
+# Lean app start, migrations and static files are handled by migrate.sh
 set -e
 
-echo "Waiting for PostgreSQL to be ready..."
-python << END
-import os
-import time
-import psycopg2
-from psycopg2 import OperationalError
+./wait_for_db.sh
 
-def wait_for_postgres():
-    while True:
-        try:
-            conn = psycopg2.connect(
-                dbname=os.getenv('DB_NAME'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                host=os.getenv('DB_HOST'),
-                port=os.getenv('DB_PORT')
-            )
-            conn.close()
-            print("PostgreSQL is ready!")
-            break
-        except OperationalError:
-            print("PostgreSQL is not ready, waiting...")
-            time.sleep(1)
+if [ "${PROFILE_IMPORTS:-False}" = "True" ]; then
+    echo "Profiling app imports to /var/log/importtime.log..."
+    python -X importtime -c "import B2Reads.wsgi; from django.urls import get_resolver; get_resolver().url_patterns" \
+        2> /var/log/importtime.log
+    echo "Slowest imports (cumulative us):"
+    sort -t '|' -k 2 -n -r /var/log/importtime.log | head -n 15
+fi
 
-wait_for_postgres()
-END
+# uWSGI serving profile, sized to the available cores unless overridden
+export WEB_SOCKET="${WEB_SOCKET:-:8000}"
+export WEB_PROCESSES="${WEB_PROCESSES:-$(nproc)}"
+export WEB_THREADS="${WEB_THREADS:-4}"
+export WEB_OFFLOAD_THREADS="${WEB_OFFLOAD_THREADS:-1}"
+export WEB_LISTEN="${WEB_LISTEN:-1024}"
+export WEB_HARAKIRI="${WEB_HARAKIRI:-30}"
+export WEB_MAX_REQUESTS="${WEB_MAX_REQUESTS:-5000}"
+export WEB_RELOAD_ON_RSS="${WEB_RELOAD_ON_RSS:-256}"
+export WEB_LOG="${WEB_LOG:-/var/log/uwsgi.log}"
 
-python manage.py makemigrations
-python manage.py migrate --noinput
-python manage.py collectstatic --noinput
-python manage.py load_initial_data
-python manage.py test
-
-exec uwsgi --ini ./uwsgi.ini
\ No newline at end of file
+exec uwsgi --ini ./uwsgi.ini
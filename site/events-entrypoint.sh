@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# ASGI app start for server-sent events, one event loop per worker holds many idle streams
+set -e
+
+./wait_for_db.sh
+
+exec uvicorn B2Reads.asgi:application --host 0.0.0.0 --port 8001 \
+    --workers "${EVENTS_WORKERS:-2}" --timeout-graceful-shutdown 5
@@ -0,0 +1,11 @@
+#!/bin/bash
+
+# One-shot release job, runs once per deploy before the app containers start
+set -e
+
+./wait_for_db.sh
+
+python manage.py migrate --noinput
+python manage.py collectstatic --noinput
+python manage.py load_initial_data
+python manage.py generate_schema
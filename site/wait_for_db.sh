@@ -0,0 +1,36 @@
+#!/bin/bash
+
+set -e
+
+echo "Waiting for PostgreSQL to be ready..."
+python << END
+import os
+import sys
+import time
+import psycopg2
+from psycopg2 import OperationalError
+
+def wait_for_postgres(timeout=float(os.getenv('DB_WAIT_TIMEOUT', 60)), delay=0.1, max_delay=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = psycopg2.connect(
+                dbname=os.getenv('DB_NAME'),
+                user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASSWORD'),
+                host=os.getenv('DB_HOST'),
+                port=os.getenv('DB_PORT'),
+                connect_timeout=3
+            )
+            conn.close()
+            print("PostgreSQL is ready!")
+            return
+        except OperationalError:
+            if time.monotonic() + delay > deadline:
+                sys.exit(f"PostgreSQL is not ready after {timeout:.0f}s, giving up.")
+            print(f"PostgreSQL is not ready, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+wait_for_postgres()
+END